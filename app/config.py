@@ -50,6 +50,7 @@ class Settings(BaseSettings):
 
     # Document Processing Configuration
     USE_DOCKLING: bool = True  # Set to False for ARM64 to avoid PyTorch/ONNX errors
+    TEXT_READ_BACKEND: str = "mmap"  # Options: "mmap", "io_uring" (Linux only, requires liburing)
 
     # Storage Backend Configuration
     STORAGE_BACKEND: str = "local"  # Options: "local", "s3"
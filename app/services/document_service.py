@@ -5,15 +5,238 @@ Handles parsing and chunking of various document formats (PDF, DOCX, CSV, JSON).
 Now supports context-aware chunking with Docling for improved RAG quality.
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+from functools import lru_cache
+import mmap
+import os
+import re
+import sys
+import numpy as np
 import tiktoken
 import logging
-from unstructured.partition.auto import partition
 from pathlib import Path
 from app.config import settings
 
 logger = logging.getLogger("rag_app.document_service")
 
+# Worker threads for tiktoken's batched encoders (the Rust core releases the GIL)
+_ENCODE_THREADS = min(8, os.cpu_count() or 1)
+
+# Zero-width split after a blank line and before the next paragraph's text.
+# Requiring non-whitespace next keeps newline runs whole, so every split point
+# is already a tiktoken pre-tokenizer boundary and the summed counts equal a
+# single encode of the full text
+_PARAGRAPH_SPLIT_RE = re.compile(r'(?<=\n\n)(?=\S)')
+
+# io_uring text reads: bytes per read request and max requests in flight
+_URING_CHUNK_SIZE = 16 * 1024 * 1024
+_URING_QUEUE_DEPTH = 8
+
+
+@lru_cache(maxsize=4)
+def _get_encoder(encoding_name: str = "cl100k_base") -> tiktoken.Encoding:
+    """
+    Return a process-wide tiktoken Encoding, building it on first use.
+
+    Constructing an Encoding loads the BPE vocabulary and mergeable ranks,
+    which is far too expensive to repeat for every chunking call.
+    """
+    return tiktoken.get_encoding(encoding_name)
+
+
+@lru_cache(maxsize=8)
+def _get_semchunker(encoding_name: str, chunk_size: int):
+    """
+    Return a cached semchunk chunker for an encoding and chunk size.
+
+    Tokens are counted with encode_ordinary, which skips tiktoken's
+    special-token scan on every candidate split semchunk evaluates.
+
+    Raises:
+        ImportError: If semchunk is not installed
+    """
+    from semchunk import chunkerify
+
+    tokenizer = _get_encoder(encoding_name)
+    return chunkerify(
+        lambda candidate: len(tokenizer.encode_ordinary(candidate)),
+        chunk_size=chunk_size
+    )
+
+
+# UTF-8 continuation bytes (0b10xxxxxx); every other byte starts a character
+_UTF8_CONTINUATION_BYTES = bytes(range(0x80, 0xC0))
+
+
+@lru_cache(maxsize=4)
+def _token_char_counts(tokenizer: tiktoken.Encoding) -> np.ndarray:
+    """
+    Number of characters each token ID starts, indexed by token ID.
+
+    A token's count is the number of non-continuation UTF-8 bytes it holds,
+    so a token that ends mid-character contributes that character and the
+    token holding the rest contributes nothing. Built once per encoding
+    (~100k entries, a few hundred KB as int32).
+    """
+    counts = np.zeros(tokenizer.n_vocab, dtype=np.int32)
+    for token_id in range(tokenizer.n_vocab):
+        try:
+            token_bytes = tokenizer.decode_single_token_bytes(token_id)
+        except KeyError:
+            continue  # Unused ID in the vocabulary
+        counts[token_id] = len(token_bytes.translate(None, _UTF8_CONTINUATION_BYTES))
+    return counts
+
+
+def _token_char_offsets(tokenizer: tiktoken.Encoding, tokens: List[int]) -> np.ndarray:
+    """
+    Map token boundaries to character offsets in the decoded text.
+
+    Returns an int32 array of len(tokens) + 1 entries where entry i is the
+    character position at which token i starts (the last entry is the total
+    length). A token boundary that falls inside a multi-byte UTF-8 character
+    is attributed to the end of that character.
+
+    Works per token from a cached per-ID character-count table, so memory is
+    a few bytes per token - no decoded bytes or per-byte arrays are built.
+    """
+    offsets = np.zeros(len(tokens) + 1, dtype=np.int32)
+    if tokens:
+        token_array = np.asarray(tokens, dtype=np.int32)
+        np.cumsum(_token_char_counts(tokenizer)[token_array], out=offsets[1:])
+    return offsets
+
+
+def _chunk_windows(num_tokens: int, chunk_size: int, overlap: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the [start, end) token range of every overlapping chunk window.
+
+    Windows advance by (chunk_size - overlap) tokens and stop at the first
+    window that reaches the end of the token stream. The window count is
+    computed in closed form, so there is no per-window Python loop and the
+    cost is a couple of vectorized NumPy ops even for million-token inputs.
+    """
+    step = chunk_size - overlap
+    if overlap < 0 or step <= 0:
+        raise ValueError("overlap must be non-negative and smaller than chunk_size")
+
+    if num_tokens == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    num_windows = max(0, -(-(num_tokens - chunk_size) // step)) + 1
+    starts = np.arange(num_windows, dtype=np.int64) * step
+    ends = np.minimum(starts + chunk_size, num_tokens)
+    return starts, ends
+
+
+def _decode_text(buffer) -> str:
+    """
+    Decode a raw file buffer, trying UTF-8 first and falling back to latin-1.
+    Newlines are normalized the same way text-mode open() does it.
+    """
+    try:
+        text = str(buffer, 'utf-8')
+    except UnicodeDecodeError:
+        text = str(buffer, 'latin-1')
+
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def _read_via_mmap(file_path: str) -> str:
+    """
+    Read a plain-text file through a read-only memory map.
+
+    Decoding straight from the mapped pages avoids building an intermediate
+    bytes copy of the whole file.
+    """
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, 'madvise'):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            return _decode_text(mm)
+
+
+def _read_via_uring(file_path: str) -> str:
+    """
+    Read a plain-text file with io_uring (Linux only, requires liburing).
+
+    The file is split into _URING_CHUNK_SIZE reads that are submitted in
+    batches of up to _URING_QUEUE_DEPTH requests per io_uring_submit call.
+
+    Raises:
+        ImportError: If liburing is not installed
+        OSError: If a read fails or returns fewer bytes than requested
+    """
+    from liburing import (
+        Ring, Cqe, io_uring_queue_init, io_uring_queue_exit, io_uring_get_sqe,
+        io_uring_prep_read, io_uring_submit, io_uring_wait_cqe, io_uring_cqe_seen,
+        trap_error
+    )
+
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        if size == 0:
+            return ""
+
+        offsets = list(range(0, size, _URING_CHUNK_SIZE))
+        buffers = [bytearray(min(_URING_CHUNK_SIZE, size - offset)) for offset in offsets]
+
+        ring = Ring()
+        cqe = Cqe()
+        io_uring_queue_init(min(len(offsets), _URING_QUEUE_DEPTH), ring)
+        try:
+            for batch_start in range(0, len(offsets), _URING_QUEUE_DEPTH):
+                batch = range(batch_start, min(batch_start + _URING_QUEUE_DEPTH, len(offsets)))
+                for i in batch:
+                    io_uring_prep_read(io_uring_get_sqe(ring), fd, buffers[i], offsets[i])
+                io_uring_submit(ring)
+
+                # Completions may arrive out of order, so check the batch total
+                bytes_read = 0
+                for _ in batch:
+                    io_uring_wait_cqe(ring, cqe)
+                    bytes_read += trap_error(cqe[0].res)
+                    io_uring_cqe_seen(ring, cqe[0])
+                if bytes_read != sum(len(buffers[i]) for i in batch):
+                    raise OSError(f"Short io_uring read from {file_path}")
+        finally:
+            io_uring_queue_exit(ring)
+
+        return _decode_text(buffers[0] if len(buffers) == 1 else b"".join(buffers))
+    finally:
+        os.close(fd)
+
+
+def _read_text_file(file_path: str) -> str:
+    """
+    Read a plain-text file using the configured TEXT_READ_BACKEND.
+    The io_uring backend falls back to mmap when it is unavailable or fails.
+    """
+    if settings.TEXT_READ_BACKEND == "io_uring" and sys.platform.startswith("linux"):
+        try:
+            return _read_via_uring(file_path)
+        except Exception as e:
+            logger.warning(f"io_uring read failed: {e}, falling back to mmap")
+
+    return _read_via_mmap(file_path)
+
+
+# Fast-path handlers keyed by file extension. Anything not listed here goes
+# through Unstructured.io, which is only imported when actually needed.
+_TEXT_HANDLERS = {
+    '.txt': _read_text_file,
+    '.md': _read_text_file,
+    '.csv': _read_text_file,
+    '.log': _read_text_file,
+    '.json': _read_text_file,
+}
+
 
 def parse_document(file_path: str) -> str:
     """
@@ -38,22 +261,18 @@ def parse_document(file_path: str) -> str:
     # Fast path for simple text files - bypass unstructured library
     # This is critical for Lambda performance (avoids 30+ second timeout)
     file_extension = Path(file_path).suffix.lower()
-    if file_extension in ['.txt', '.md', '.csv', '.log', '.json']:
+    handler = _TEXT_HANDLERS.get(file_extension)
+    if handler is not None:
         try:
             logger.info(f"Using fast text read for {file_extension} file")
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        except UnicodeDecodeError:
-            # Try with different encoding
-            try:
-                with open(file_path, 'r', encoding='latin-1') as f:
-                    return f.read()
-            except Exception as e:
-                logger.warning(f"Fast text read failed: {e}, falling back to unstructured")
+            return handler(file_path)
         except Exception as e:
             logger.warning(f"Fast text read failed: {e}, falling back to unstructured")
 
     try:
+        # Imported lazily - loading unstructured is slow and text files never need it
+        from unstructured.partition.auto import partition
+
         # Use Unstructured.io's auto partition for complex formats (PDF, DOCX, etc.)
         # strategy="fast" disables OCR (tesseract) for Lambda compatibility
         # OCR can be enabled by adding tesseract Lambda layer and using strategy="hi_res"
@@ -72,6 +291,53 @@ def parse_document(file_path: str) -> str:
         raise Exception(f"Failed to parse document {file_path}: {str(e)}")
 
 
+def _token_chunks(
+    text: str,
+    chunk_size: int,
+    overlap: int,
+    encoding_name: str,
+    include_token_ids: bool
+) -> List[Dict[str, Any]]:
+    """Shared implementation of chunk_text and chunk_text_ids."""
+    # Initialize tokenizer
+    try:
+        tokenizer = _get_encoder(encoding_name)
+    except Exception:
+        # Fallback to default encoding (cl100k_base is the GPT-4 encoding)
+        tokenizer = _get_encoder()
+
+    # Encode the entire text once (encode_ordinary skips the special-token scan)
+    tokens = tokenizer.encode_ordinary(text)
+
+    # Exact character offset of every token boundary, so chunks can be sliced
+    # straight out of the source text instead of decoding each window
+    char_offsets = _token_char_offsets(tokenizer, tokens)
+
+    # Precompute all window boundaries, then build the chunk list in one pass
+    starts, ends = _chunk_windows(len(tokens), chunk_size, overlap)
+    token_counts = (ends - starts).tolist()
+    start_chars = char_offsets[starts].tolist()
+    end_chars = char_offsets[ends].tolist()
+
+    chunks = [
+        {
+            'text': text[start_char:end_char],
+            'chunk_index': idx,
+            'token_count': token_count,
+            'start_char': start_char,
+            'end_char': end_char
+        }
+        for idx, (token_count, start_char, end_char)
+        in enumerate(zip(token_counts, start_chars, end_chars))
+    ]
+
+    if include_token_ids:
+        for chunk, start_idx, end_idx in zip(chunks, starts.tolist(), ends.tolist()):
+            chunk['token_ids'] = tokens[start_idx:end_idx]
+
+    return chunks
+
+
 def chunk_text(
     text: str,
     chunk_size: int = 512,
@@ -95,56 +361,33 @@ def chunk_text(
             - start_char: Starting character position
             - end_char: Ending character position
     """
-    # Initialize tokenizer
-    try:
-        tokenizer = tiktoken.get_encoding(encoding_name)
-    except Exception:
-        # Fallback to default encoding
-        tokenizer = tiktoken.encoding_for_model("gpt-4")
-
-    # Encode the entire text
-    tokens = tokenizer.encode(text)
-
-    chunks = []
-    start_idx = 0
-
-    while start_idx < len(tokens):
-        # Get chunk tokens
-        end_idx = min(start_idx + chunk_size, len(tokens))
-        chunk_tokens = tokens[start_idx:end_idx]
-
-        # Decode back to text
-        chunk_text = tokenizer.decode(chunk_tokens)
-
-        # Calculate character positions (approximate)
-        if chunks:
-            # For subsequent chunks, use the previous end position
-            start_char = chunks[-1]['end_char'] - (overlap * 4)  # Rough estimate
-            start_char = max(0, start_char)
-        else:
-            start_char = 0
-
-        end_char = start_char + len(chunk_text)
-
-        # Create chunk metadata
-        chunk_data = {
-            'text': chunk_text,
-            'chunk_index': len(chunks),
-            'token_count': len(chunk_tokens),
-            'start_char': start_char,
-            'end_char': end_char
-        }
+    return _token_chunks(text, chunk_size, overlap, encoding_name, include_token_ids=False)
 
-        chunks.append(chunk_data)
 
-        # Move to next chunk with overlap
-        start_idx += (chunk_size - overlap)
+def chunk_text_ids(
+    text: str,
+    chunk_size: int = 512,
+    overlap: int = 50,
+    encoding_name: str = "cl100k_base"  # GPT-4 encoding
+) -> List[Dict[str, Any]]:
+    """
+    Split text into overlapping token chunks, keeping each chunk's token IDs.
+
+    Same chunks as chunk_text, plus a 'token_ids' list per chunk that can be
+    passed to EmbeddingService.generate_embeddings(token_ids=...) so the
+    embeddings API receives the already-computed tokens.
 
-        # Break if we've reached the end
-        if end_idx >= len(tokens):
-            break
+    Args:
+        text: The text to chunk
+        chunk_size: Maximum tokens per chunk (default: 512)
+        overlap: Number of overlapping tokens between chunks (default: 50)
+        encoding_name: Tokenizer encoding to use (default: cl100k_base for GPT-4)
 
-    return chunks
+    Returns:
+        List of chunk dictionaries as returned by chunk_text, plus:
+            - token_ids: Token IDs of the chunk
+    """
+    return _token_chunks(text, chunk_size, overlap, encoding_name, include_token_ids=True)
 
 
 def chunk_text_semantic(
@@ -171,24 +414,26 @@ def chunk_text_semantic(
         List of dictionaries containing chunk metadata
     """
     # Initialize tokenizer
-    tokenizer = tiktoken.get_encoding(encoding_name)
+    tokenizer = _get_encoder(encoding_name)
 
     try:
-        from semchunk import chunkerify
-
-        # Create chunker with tokenizer and chunk size
-        chunker = chunkerify(tokenizer, chunk_size=chunk_size)
+        # Reuse the cached chunker for this encoding and chunk size
+        chunker = _get_semchunker(encoding_name, chunk_size)
 
         # Use semchunk for semantic boundaries
         semantic_chunks = chunker(text)
 
+        # Tokenize all semantic chunks in a single batched call instead of
+        # crossing the Python/Rust boundary once per chunk
+        chunk_tokens = tokenizer.encode_ordinary_batch(
+            list(semantic_chunks), num_threads=_ENCODE_THREADS
+        )
+
         # Convert to standard format with metadata
         chunks = []
         char_position = 0
 
-        for idx, chunk_text in enumerate(semantic_chunks):
-            tokens = tokenizer.encode(chunk_text)
-
+        for idx, (chunk_text, tokens) in enumerate(zip(semantic_chunks, chunk_tokens)):
             chunk_data = {
                 'text': chunk_text,
                 'chunk_index': idx,
@@ -255,17 +500,21 @@ def get_document_stats(file_path: str) -> Dict[str, Any]:
     # Parse document
     text = parse_document(file_path)
 
-    # Get token count
-    tokenizer = tiktoken.encoding_for_model("gpt-4")
-    tokens = tokenizer.encode(text)
+    # Get token count - tokenize paragraphs in parallel and sum the lengths
+    tokenizer = _get_encoder()
+    paragraphs = _PARAGRAPH_SPLIT_RE.split(text)
+    token_count = sum(
+        len(tokens)
+        for tokens in tokenizer.encode_ordinary_batch(paragraphs, num_threads=_ENCODE_THREADS)
+    )
 
     return {
         "filename": path.name,
         "file_size_bytes": path.stat().st_size,
         "file_type": path.suffix,
         "character_count": len(text),
-        "token_count": len(tokens),
-        "estimated_chunks_512": (len(tokens) // 512) + 1
+        "token_count": token_count,
+        "estimated_chunks_512": (token_count // 512) + 1
     }
 
 
@@ -292,7 +541,7 @@ def parse_and_chunk_with_context(file_path: str, chunk_size: int = 512, min_chun
     # Fast path for simple text files - bypass Docling to avoid Lambda timeout
     # This is critical for Lambda performance (Docling causes 30+ second timeout)
     file_extension = Path(file_path).suffix.lower()
-    if file_extension in ['.txt', '.md', '.csv', '.log', '.json']:
+    if file_extension in _TEXT_HANDLERS:
         logger.info(f"Using fast semantic chunking for {file_extension} file (bypassing Docling)")
         text = parse_document(file_path)  # Uses fast path internally
         chunks = chunk_text_semantic(text, chunk_size=chunk_size)
@@ -3,13 +3,166 @@ Embedding Service
 Handles generation of embeddings using OpenAI's API.
 """
 
-from typing import List, Tuple, Optional, Dict
-from openai import AsyncOpenAI
+from typing import List, Tuple, Optional, Dict, Callable, Awaitable
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+import asyncio
+import base64
+import httpx
 import logging
+import numpy as np
+import weakref
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Texts per embeddings.create request, and max requests in flight at once
+EMBEDDING_BATCH_SIZE = 64
+EMBEDDING_MAX_CONCURRENCY = 8
+
+# How long concurrent single-text requests wait to be coalesced into one call
+EMBEDDING_COALESCE_WINDOW = 0.005  # seconds
+
+
+# Shared AsyncOpenAI clients, per event loop and API key; entries go away with their loop
+_openai_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, AsyncOpenAI]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_openai_client(api_key: str) -> AsyncOpenAI:
+    """
+    Return the shared AsyncOpenAI client for the given API key and running event loop.
+
+    Sharing one client (and its httpx connection pool) across services avoids
+    a fresh TCP + TLS handshake per service instance. Pooled connections are
+    bound to the loop that opened them, so each loop (e.g. one per
+    asyncio.run) gets its own client. HTTP/2 is enabled when the h2 package
+    is installed. DefaultAsyncHttpxClient keeps the SDK's default timeouts and
+    redirect handling.
+
+    Raises:
+        RuntimeError: If called outside a running event loop
+    """
+    clients = _openai_clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(api_key)
+    if client is None:
+        limits = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+        try:
+            http_client = DefaultAsyncHttpxClient(http2=True, limits=limits)
+        except ImportError:
+            logger.info("h2 package not installed, using HTTP/1.1 for OpenAI requests")
+            http_client = DefaultAsyncHttpxClient(limits=limits)
+        client = clients[api_key] = AsyncOpenAI(api_key=api_key, http_client=http_client)
+    return client
+
+
+def _encode_embedding(embedding: List[float]) -> str:
+    """
+    Pack an embedding as base64-encoded float16 bytes for caching.
+
+    ~4 KB per 1536-dim vector instead of ~27 KB as a JSON float list.
+    Base64 is needed because Upstash's REST API only carries strings.
+    """
+    return base64.b64encode(np.asarray(embedding, dtype=np.float16).tobytes()).decode("ascii")
+
+
+def _decode_embedding(payload: str) -> List[float]:
+    """Unpack an embedding cached by _encode_embedding."""
+    return np.frombuffer(base64.b64decode(payload), dtype=np.float16).astype(np.float32).tolist()
+
+
+def _cached_embedding(cached: Optional[Dict]) -> Optional[List[float]]:
+    """Extract the embedding from a cache entry (packed float16 or legacy float list)."""
+    if not cached:
+        return None
+    if "embedding_f16" in cached:
+        return _decode_embedding(cached["embedding_f16"])
+    return cached.get("embedding")
+
+
+def _usage_share(
+    usage: Optional[Dict], text_chars: int, total_chars: int, batch_size: int
+) -> Optional[Dict]:
+    """
+    Attribute part of a coalesced batch's usage to one caller.
+
+    Token counts are split in proportion to text length so the shares add up
+    to (roughly) the batch total for cost tracking; other fields describe the
+    whole batch. A batch of one gets the usage unchanged.
+    """
+    if usage is None or batch_size == 1:
+        return usage
+
+    share = dict(usage, coalesced_requests=batch_size)
+    fraction = text_chars / total_chars if total_chars else 1 / batch_size
+    for key in ("prompt_tokens", "total_tokens"):
+        if key in share:
+            share[key] = round(share[key] * fraction)
+    return share
+
+
+class _EmbedBatcher:
+    """
+    Coalesces concurrent single-text embedding requests into batched calls.
+
+    Requests are collected until EMBEDDING_BATCH_SIZE are pending or
+    EMBEDDING_COALESCE_WINDOW has passed since the first one, whichever comes
+    first; the whole batch is then embedded with one embed_fn call and each
+    caller's future is resolved with its own vector and its share of the
+    batch's usage (see _usage_share).
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[List[str]], Awaitable[Tuple[List[List[float]], Optional[Dict]]]]
+    ):
+        self._embed_fn = embed_fn
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()  # Strong references so in-flight flushes aren't GC'd
+
+    async def submit(self, text: str) -> Tuple[List[float], Optional[Dict]]:
+        """Queue a text for the next batch and wait for its (embedding, usage)."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= EMBEDDING_BATCH_SIZE:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(EMBEDDING_COALESCE_WINDOW, self._start_flush)
+
+        return await future
+
+    def _start_flush(self):
+        """Hand the pending batch to a background task."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._flush(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, batch: List[Tuple[str, asyncio.Future]]):
+        """Embed a batch and resolve every caller waiting on it."""
+        try:
+            embeddings, usage = await self._embed_fn([text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        total_chars = sum(len(text) for text, _ in batch)
+        for (text, future), embedding in zip(batch, embeddings):
+            if not future.done():  # Caller may have been cancelled
+                future.set_result(
+                    (embedding, _usage_share(usage, len(text), total_chars, len(batch)))
+                )
+
 
 class EmbeddingService:
     """Service for generating text embeddings using OpenAI."""
@@ -26,12 +179,92 @@ class EmbeddingService:
         if not self.api_key:
             raise ValueError("OpenAI API key is required. Set OPENAI_API_KEY in .env file.")
 
-        self.client = AsyncOpenAI(api_key=self.api_key)
         self.model = "text-embedding-3-small"  # 1536 dimensions
         self.dimensions = 1536
         self.query_cache_service = query_cache_service  # Optional cache service
+        self._batcher = _EmbedBatcher(self.generate_embeddings)
+
+        # Caps embeddings.create requests in flight across every caller of this
+        # service (uploads, batcher flushes); created lazily in the running loop
+        self._api_semaphore: Optional[asyncio.Semaphore] = None
+        self._api_semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """Shared OpenAI client for the running event loop (see get_openai_client)."""
+        return get_openai_client(self.api_key)
+
+    def _get_api_semaphore(self) -> asyncio.Semaphore:
+        """Return this service's request semaphore for the current event loop."""
+        loop = asyncio.get_running_loop()
+        if self._api_semaphore is None or self._api_semaphore_loop is not loop:
+            # asyncio primitives are bound to one loop (e.g. one per asyncio.run)
+            self._api_semaphore = asyncio.Semaphore(EMBEDDING_MAX_CONCURRENCY)
+            self._api_semaphore_loop = loop
+        return self._api_semaphore
+
+    async def _create_embeddings(
+        self, texts: List[str], token_ids: Optional[List[List[int]]] = None
+    ) -> Tuple[List[List[float]], Optional[Dict]]:
+        """
+        Call the embeddings API in concurrent sub-batches of EMBEDDING_BATCH_SIZE.
+
+        At most EMBEDDING_MAX_CONCURRENCY requests are in flight per service,
+        shared across all concurrent calls.
+
+        Identical texts (repeated headers, footers, table rows) are embedded
+        once and the result is fanned back out to every position.
+
+        Args:
+            texts: List of text strings to embed
+            token_ids: Optional cl100k_base token IDs for each text; when given,
+                these are sent to the API instead of the raw strings
 
-    async def generate_embeddings(self, texts: List[str]) -> Tuple[List[List[float]], Optional[Dict]]:
+        Returns:
+            Tuple of (embeddings in input order, summed token usage or None)
+        """
+        # Map each distinct text to the positions it occurs at
+        positions: Dict[str, List[int]] = {}
+        for i, text in enumerate(texts):
+            positions.setdefault(text, []).append(i)
+        if token_ids is not None:
+            unique_inputs = [token_ids[indices[0]] for indices in positions.values()]
+        else:
+            unique_inputs = list(positions)
+
+        semaphore = self._get_api_semaphore()
+
+        async def _embed_batch(batch: List):
+            async with semaphore:
+                return await self.client.embeddings.create(
+                    model=self.model,
+                    input=batch,
+                    encoding_format="float"
+                )
+
+        responses = await asyncio.gather(*[
+            _embed_batch(unique_inputs[i:i + EMBEDDING_BATCH_SIZE])
+            for i in range(0, len(unique_inputs), EMBEDDING_BATCH_SIZE)
+        ])
+
+        unique_embeddings = (item.embedding for response in responses for item in response.data)
+
+        embeddings: List[List[float]] = [None] * len(texts)
+        for indices, embedding in zip(positions.values(), unique_embeddings):
+            for i in indices:
+                embeddings[i] = embedding
+
+        usages = [response.usage for response in responses if getattr(response, 'usage', None)]
+        usage = {
+            "prompt_tokens": sum(u.prompt_tokens for u in usages),
+            "total_tokens": sum(u.total_tokens for u in usages)
+        } if usages else None
+
+        return embeddings, usage
+
+    async def generate_embeddings(
+        self, texts: List[str], token_ids: Optional[List[List[int]]] = None
+    ) -> Tuple[List[List[float]], Optional[Dict]]:
         """
         Generate embeddings for a list of texts with caching support.
 
@@ -41,7 +274,9 @@ class EmbeddingService:
         - Falls back to uncached if Redis unavailable
 
         Args:
-            texts: List of text strings to embed
+            texts: List of text strings to embed (also used for cache keys)
+            token_ids: Optional cl100k_base token IDs per text (e.g. from
+                chunk_text_ids); sent to the API in place of the strings
 
         Returns:
             Tuple of (embeddings, usage_info) where:
@@ -58,47 +293,48 @@ class EmbeddingService:
         if self.query_cache_service and self.query_cache_service.enabled:
             embeddings = []
             texts_to_generate = []
+            tokens_to_generate = [] if token_ids is not None else None
             text_indices = []  # Track original indices for uncached texts
             cache_hits = 0
             cache_misses = 0
 
-            for i, text in enumerate(texts):
-                cache_key = self.query_cache_service.get_embedding_key(text)
-                cached = self.query_cache_service.get(cache_key, cache_type="embedding")
+            # Look up every text in a single MGET round-trip
+            cache_keys = [self.query_cache_service.get_embedding_key(text) for text in texts]
+            cached_values = self.query_cache_service.mget(cache_keys, cache_type="embedding")
 
-                if cached and "embedding" in cached:
-                    embeddings.append(cached["embedding"])
+            for i, (text, cached) in enumerate(zip(texts, cached_values)):
+                cached_embedding = _cached_embedding(cached)
+                if cached_embedding is not None:
+                    embeddings.append(cached_embedding)
                     cache_hits += 1
                 else:
                     embeddings.append(None)  # Placeholder
                     texts_to_generate.append(text)
+                    if tokens_to_generate is not None:
+                        tokens_to_generate.append(token_ids[i])
                     text_indices.append(i)
                     cache_misses += 1
 
             # Generate embeddings for uncached texts
             if texts_to_generate:
                 try:
-                    response = await self.client.embeddings.create(
-                        model=self.model,
-                        input=texts_to_generate,
-                        encoding_format="float"
+                    new_embeddings, usage = await self._create_embeddings(
+                        texts_to_generate, tokens_to_generate
                     )
 
-                    new_embeddings = [item.embedding for item in response.data]
-
-                    # Cache new embeddings and fill in results
+                    # Fill in results and collect new embeddings for caching
+                    new_cache_values = {}
                     for idx, embedding in zip(text_indices, new_embeddings):
                         embeddings[idx] = embedding
-
-                        # Cache individual embedding
-                        cache_key = self.query_cache_service.get_embedding_key(texts[idx])
-                        cache_value = {
-                            "embedding": embedding,
+                        new_cache_values[cache_keys[idx]] = {
+                            "embedding_f16": _encode_embedding(embedding),
                             "model": self.model,
                             "text_length": len(texts[idx])
                         }
-                        ttl = settings.CACHE_TTL_EMBEDDINGS  # Default: 7 days
-                        self.query_cache_service.set(cache_key, cache_value, ttl=ttl, cache_type="embedding")
+
+                    # Cache all new embeddings in one pipelined request
+                    ttl = settings.CACHE_TTL_EMBEDDINGS  # Default: 7 days
+                    self.query_cache_service.mset(new_cache_values, ttl=ttl, cache_type="embedding")
 
                     # Log cache statistics
                     logger.debug(f"Embedding cache: {cache_hits} hits, {cache_misses} misses "
@@ -106,12 +342,12 @@ class EmbeddingService:
 
                     # Build usage info
                     usage_info = {
-                        "prompt_tokens": response.usage.prompt_tokens,
-                        "total_tokens": response.usage.total_tokens,
+                        "prompt_tokens": usage["prompt_tokens"],
+                        "total_tokens": usage["total_tokens"],
                         "model": self.model,
                         "cache_hits": cache_hits,
                         "cache_misses": cache_misses
-                    } if hasattr(response, 'usage') and response.usage else {
+                    } if usage else {
                         "cache_hits": cache_hits,
                         "cache_misses": cache_misses
                     }
@@ -131,19 +367,13 @@ class EmbeddingService:
 
         # No cache available - generate all embeddings
         try:
-            response = await self.client.embeddings.create(
-                model=self.model,
-                input=texts,
-                encoding_format="float"
-            )
-
-            embeddings = [item.embedding for item in response.data]
+            embeddings, usage = await self._create_embeddings(texts, token_ids)
 
             usage_info = {
-                "prompt_tokens": response.usage.prompt_tokens,
-                "total_tokens": response.usage.total_tokens,
+                "prompt_tokens": usage["prompt_tokens"],
+                "total_tokens": usage["total_tokens"],
                 "model": self.model
-            } if hasattr(response, 'usage') and response.usage else None
+            } if usage else None
 
             return embeddings, usage_info
 
@@ -154,14 +384,33 @@ class EmbeddingService:
         """
         Generate embedding for a single text.
 
+        Concurrent callers are coalesced into one batched generate_embeddings
+        call (see _EmbedBatcher), so bursts of single queries share API requests.
+
         Args:
             text: Text string to embed
 
         Returns:
             Embedding vector (list of floats)
         """
-        embeddings, _ = await self.generate_embeddings([text])
-        return embeddings[0]
+        embedding, _ = await self._batcher.submit(text)
+        return embedding
+
+    async def generate_query_embedding(self, text: str) -> Tuple[List[float], Optional[Dict]]:
+        """
+        Generate embedding for a single query text, with usage for cost tracking.
+
+        Coalesced with other concurrent single-text requests like
+        generate_single_embedding.
+
+        Args:
+            text: Text string to embed
+
+        Returns:
+            Tuple of (embedding, usage_info); when the request was coalesced,
+            usage_info carries this text's share of the batch's token counts
+        """
+        return await self._batcher.submit(text)
 
     def get_embedding_dimension(self) -> int:
         """
@@ -11,13 +11,37 @@ Separate from document cache (S3/local) which handles large file storage.
 """
 
 import json
-import hashlib
+import base64
 import logging
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 
+# Required: cache keys are xxh3_128 digests, and a different hash would
+# silently orphan every existing entry
+import xxhash
+
 logger = logging.getLogger(__name__)
 
+# Keys per SCAN page / variadic DEL call (keeps Upstash REST request bodies small)
+DELETE_BATCH_SIZE = 500
+
+# Serialized payloads larger than this are zstd-compressed before storage
+COMPRESSION_THRESHOLD = 2048
+COMPRESSION_LEVEL = 3
+COMPRESSION_MIN_RATIO = 0.9  # Keep the compressed form only if it saves >= 10%
+COMPRESSED_PREFIX = "Z:"  # Never the first characters of a JSON document
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
 
 class QueryCacheService:
     """Redis-based cache service for query results, embeddings, and SQL."""
@@ -72,15 +96,54 @@ class QueryCacheService:
             )
 
     def _compute_hash(self, text: str) -> str:
-        """Compute SHA-256 hash of text for cache keys."""
-        return hashlib.sha256(text.strip().encode()).hexdigest()
+        """
+        Compute a 128-bit hash of text for cache keys.
+
+        Keys only need to be collision-resistant, not cryptographic, so this
+        uses xxh3 instead of SHA-256.
+        """
+        return xxhash.xxh3_128_hexdigest(text.strip().encode())
 
     def _serialize(self, value: Any) -> str:
-        """Serialize value to JSON string for storage."""
-        return json.dumps(value, default=str)  # default=str handles datetime objects
+        """
+        Serialize value to a string for storage.
+
+        Uses orjson when available. Payloads above COMPRESSION_THRESHOLD are
+        zstd-compressed and base64-encoded behind COMPRESSED_PREFIX (Upstash's
+        REST API only carries strings); smaller ones are stored as plain JSON.
+        Compression is kept only when it saves at least 10%, so already-dense
+        payloads (e.g. base64 float16 embeddings) don't pay to decompress on
+        every hit for a negligible saving.
+        """
+        if orjson is not None:
+            # orjson handles datetime and numpy natively; default=str covers the rest
+            raw = orjson.dumps(
+                value,
+                default=str,
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            )
+        else:
+            raw = json.dumps(value, default=str).encode()  # default=str handles datetime objects
+
+        if zstandard is not None and len(raw) > COMPRESSION_THRESHOLD:
+            compressed = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL).compress(raw)
+            encoded = COMPRESSED_PREFIX + base64.b64encode(compressed).decode("ascii")
+            if len(encoded) < COMPRESSION_MIN_RATIO * len(raw):
+                return encoded
+
+        return raw.decode()
 
     def _deserialize(self, value: str) -> Any:
-        """Deserialize JSON string to Python object."""
+        """Deserialize a stored string (plain or compressed JSON) to a Python object."""
+        if value.startswith(COMPRESSED_PREFIX):
+            if zstandard is None:
+                raise ValueError("Compressed cache entry found but zstandard is not installed")
+            value = zstandard.ZstdDecompressor().decompress(
+                base64.b64decode(value[len(COMPRESSED_PREFIX):])
+            )
+
+        if orjson is not None:
+            return orjson.loads(value)
         return json.loads(value)
 
     # ==================== Core Cache Operations ====================
@@ -144,6 +207,76 @@ class QueryCacheService:
             logger.warning(f"Cache SET error for key {key}: {e}")
             return False
 
+    def mget(self, keys: List[str], cache_type: str = "rag") -> List[Optional[Dict]]:
+        """
+        Retrieve multiple values from cache in a single MGET round-trip.
+
+        Args:
+            keys: Cache keys
+            cache_type: Type of cache for statistics ("rag", "embedding", "sql_gen", "sql_result")
+
+        Returns:
+            List of cached values (or None for misses), in the same order as keys
+        """
+        if not keys:
+            return []
+
+        if not self.enabled:
+            for _ in keys:
+                self._record_miss(cache_type)
+            return [None] * len(keys)
+
+        try:
+            results = self.client.mget(*keys)
+        except Exception as e:
+            logger.warning(f"Cache MGET error for {len(keys)} keys: {e}")
+            results = [None] * len(keys)
+
+        values = []
+        for key, result in zip(keys, results):
+            if result is None:
+                self._record_miss(cache_type)
+                values.append(None)
+                continue
+
+            try:
+                values.append(self._deserialize(result))
+                self._record_hit(cache_type)
+            except Exception as e:
+                logger.warning(f"Cache MGET decode error for key {key}: {e}")
+                self._record_miss(cache_type)
+                values.append(None)
+
+        logger.debug(f"Cache MGET: {len(keys)} keys")
+        return values
+
+    def mset(self, mapping: Dict[str, Dict], ttl: int, cache_type: str = "rag") -> bool:
+        """
+        Store multiple values with TTL using one pipelined request.
+
+        Args:
+            mapping: Dict of cache key -> value (values must be JSON-serializable)
+            ttl: Time-to-live in seconds (applied to every key)
+            cache_type: Type of cache for logging
+
+        Returns:
+            True if successful, False otherwise
+        """
+        if not self.enabled or not mapping:
+            return False
+
+        try:
+            pipeline = self.client.pipeline()
+            for key, value in mapping.items():
+                pipeline.setex(key, ttl, self._serialize(value))
+            pipeline.exec()
+            logger.debug(f"Cache MSET: {len(mapping)} {cache_type} keys (TTL: {ttl}s)")
+            return True
+
+        except Exception as e:
+            logger.warning(f"Cache MSET error for {len(mapping)} keys: {e}")
+            return False
+
     def delete(self, pattern: str) -> int:
         """
         Delete keys matching pattern.
@@ -158,16 +291,16 @@ class QueryCacheService:
             return 0
 
         try:
-            # Upstash Redis doesn't support SCAN, so we use KEYS (acceptable for moderate cache sizes)
-            keys = self.client.keys(pattern)
-            if not keys:
-                return 0
-
-            # Delete keys in batches
+            # Walk the keyspace with SCAN (non-blocking, unlike KEYS) and delete
+            # each page with one variadic DEL round-trip
             deleted = 0
-            for key in keys:
-                self.client.delete(key)
-                deleted += 1
+            cursor = 0
+            while True:
+                cursor, keys = self.client.scan(cursor, match=pattern, count=DELETE_BATCH_SIZE)
+                if keys:
+                    deleted += self.client.delete(*keys)
+                if int(cursor) == 0:
+                    break
 
             logger.info(f"Cache invalidation: Deleted {deleted} keys matching '{pattern}'")
             return deleted
@@ -4,11 +4,11 @@ Combines vector search with LLM generation to answer questions from documents.
 """
 
 from typing import List, Dict, Any, Optional
-from openai import AsyncOpenAI
 import logging
+from openai import AsyncOpenAI
 from app.config import settings
 from app.services.vector_service import VectorService
-from app.services.embedding_service import EmbeddingService
+from app.services.embedding_service import EmbeddingService, get_openai_client
 
 logger = logging.getLogger(__name__)
 
@@ -31,7 +31,6 @@ class RAGService:
         # Initialize services
         self.embedding_service = EmbeddingService(api_key=self.api_key, query_cache_service=query_cache_service)
         self.vector_service = VectorService()
-        self.llm_client = AsyncOpenAI(api_key=self.api_key)
         self.query_cache_service = query_cache_service  # Optional cache service
 
         # LLM configuration
@@ -39,6 +38,11 @@ class RAGService:
         self.temperature = 0.1
         self.max_tokens = 1000
 
+    @property
+    def llm_client(self) -> AsyncOpenAI:
+        """Shared OpenAI client for the running event loop (see get_openai_client)."""
+        return get_openai_client(self.api_key)
+
     async def generate_answer(
         self,
         question: str,
@@ -84,8 +88,10 @@ class RAGService:
                         "cost_saved": "$0.05"  # Approximate GPT-4 cost per query
                     }
             # Step 1: Generate query embedding with usage tracking
-            embeddings, embedding_usage = await self.embedding_service.generate_embeddings([question])
-            query_embedding = embeddings[0]
+            # (coalesced with other concurrent queries into one embeddings call)
+            query_embedding, embedding_usage = await self.embedding_service.generate_query_embedding(
+                question
+            )
 
             # Step 2: Search for relevant chunks in Pinecone
             search_results = await self.vector_service.search(
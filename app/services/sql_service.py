@@ -6,6 +6,7 @@ Handles Text-to-SQL conversion using Vanna.ai 2.0 with OpenAI and PostgreSQL.
 from typing import Dict, Any, List, Optional
 import uuid
 import asyncio
+import re
 import pandas as pd
 import logging
 
@@ -30,6 +31,9 @@ except ImportError:
 
 from app.config import settings
 
+# Leading-SELECT check without copying the SQL via strip()/upper()
+_SELECT_PREFIX_RE = re.compile(r'\s*SELECT', re.IGNORECASE)
+
 
 class SimpleUserResolver(UserResolver):
     """Simple user resolver for SQL service - grants full access."""
@@ -573,7 +577,7 @@ Columns:
         sql = query_info['sql']
 
         # Check if this is a SELECT query (safe to cache)
-        is_select_query = sql.strip().upper().startswith("SELECT")
+        is_select_query = _SELECT_PREFIX_RE.match(sql) is not None
 
         # Check cache for SELECT queries only
         if is_select_query and self.query_cache_service and self.query_cache_service.enabled:
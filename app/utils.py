@@ -4,7 +4,48 @@ Utility functions for validation, error handling, and common operations.
 
 from typing import Optional, List
 from fastapi import HTTPException, UploadFile
+import os
 import re
+import threading
+
+# Optional SIMD multi-pattern matcher; falls back to the compiled re pattern
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+
+def _compile_hyperscan(patterns: List[str]):
+    """
+    Compile patterns into a case-insensitive Hyperscan block-mode database.
+
+    Args:
+        patterns: Regex patterns to compile
+
+    Returns:
+        Compiled hyperscan.Database, or None if Hyperscan is unavailable
+    """
+    if hyperscan is None:
+        return None
+
+    try:
+        db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+        db.compile(
+            expressions=[p.encode() for p in patterns],
+            ids=list(range(len(patterns))),
+            elements=len(patterns),
+            flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(patterns)
+        )
+        return db
+    except hyperscan.error:
+        # Unsupported CPU / pattern - use the re fallback
+        return None
+
+
+def _on_hyperscan_match(pattern_id, start, end, flags, context) -> bool:
+    """Record a match and stop scanning (first match is enough)."""
+    context[0] = True
+    return True
 
 
 class ValidationError(Exception):
@@ -25,6 +66,9 @@ class FileValidator:
         '.txt': 'text/plain'
     }
 
+    # Comma-separated extension list for error messages (built once)
+    _ALLOWED_STR = ', '.join(ALLOWED_EXTENSIONS)
+
     # Maximum file size (50 MB)
     MAX_FILE_SIZE = 50 * 1024 * 1024  # 50 MB in bytes
 
@@ -43,26 +87,55 @@ class FileValidator:
             raise ValidationError("No file provided or filename is empty")
 
         # Check file extension
-        file_ext = '.' + file.filename.rsplit('.', 1)[-1].lower() if '.' in file.filename else ''
+        file_ext = FileValidator.get_file_extension(file.filename)
 
         if file_ext not in FileValidator.ALLOWED_EXTENSIONS:
-            allowed = ', '.join(FileValidator.ALLOWED_EXTENSIONS.keys())
             raise ValidationError(
-                f"Invalid file type '{file_ext}'. Allowed types: {allowed}"
+                f"Invalid file type '{file_ext}'. Allowed types: {FileValidator._ALLOWED_STR}"
             )
 
-        # Check file size (if available)
-        if hasattr(file, 'size') and file.size:
-            if file.size > FileValidator.MAX_FILE_SIZE:
-                max_mb = FileValidator.MAX_FILE_SIZE / (1024 * 1024)
-                raise ValidationError(
-                    f"File size exceeds maximum allowed size of {max_mb:.0f} MB"
-                )
+        # Check file size (reported by the upload, or measured from the spooled file)
+        size = getattr(file, 'size', None)
+        if size is None:
+            size = FileValidator._measure_file_size(getattr(file, 'file', None))
+
+        if size and size > FileValidator.MAX_FILE_SIZE:
+            max_mb = FileValidator.MAX_FILE_SIZE / (1024 * 1024)
+            raise ValidationError(
+                f"File size exceeds maximum allowed size of {max_mb:.0f} MB"
+            )
+
+    @staticmethod
+    def _measure_file_size(fileobj) -> Optional[int]:
+        """
+        Measure an upload's size without reading it into memory.
+
+        Uploads are spooled to a SpooledTemporaryFile, so the size is found by
+        seeking to the end and back - no bytes are read.
+
+        Args:
+            fileobj: Underlying file object of the upload
+
+        Returns:
+            Size in bytes, or None if the file is not seekable
+        """
+        if fileobj is None:
+            return None
+
+        try:
+            if not fileobj.seekable():
+                return None
+            position = fileobj.tell()
+            size = fileobj.seek(0, os.SEEK_END)
+            fileobj.seek(position)
+            return size
+        except (AttributeError, OSError):
+            return None
 
     @staticmethod
     def get_file_extension(filename: str) -> str:
         """Get the file extension from filename."""
-        return '.' + filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+        return os.path.splitext(filename)[1].lower()
 
 
 class QueryValidator:
@@ -83,6 +156,20 @@ class QueryValidator:
         r'\bUPDATE\s+\w+\s+SET\b'
     ]
 
+    # All dangerous patterns as one alternation, compiled once (single scan per query)
+    _DANGEROUS_RE = re.compile(
+        '|'.join(f'(?:{p})' for p in DANGEROUS_SQL_PATTERNS),
+        re.IGNORECASE
+    )
+
+    # Hyperscan database for the same patterns (None when unavailable).
+    # Scratch space is not thread-safe, so each thread clones its own.
+    _DANGEROUS_HS_DB = _compile_hyperscan(DANGEROUS_SQL_PATTERNS)
+    _hs_local = threading.local()
+
+    # Line and block SQL comments, stripped in one pass by sanitize_sql_for_display
+    _COMMENT_RE = re.compile(r'--[^\n]*|/\*.*?\*/', re.DOTALL)
+
     @staticmethod
     def validate_question(question: str, allow_empty: bool = False) -> str:
         """
@@ -154,13 +241,29 @@ class QueryValidator:
         Returns:
             True if dangerous patterns found, False otherwise
         """
-        sql_upper = sql.upper()
-
-        for pattern in QueryValidator.DANGEROUS_SQL_PATTERNS:
-            if re.search(pattern, sql_upper, re.IGNORECASE):
-                return True
+        # Hyperscan matches bytes, so \w/\s/\b only agree with Python's Unicode
+        # re on ASCII input (and \b is unsupported in its UCP mode)
+        db = QueryValidator._DANGEROUS_HS_DB
+        if db is None or not sql.isascii():
+            return QueryValidator._DANGEROUS_RE.search(sql) is not None
+
+        local = QueryValidator._hs_local
+        scratch = getattr(local, 'scratch', None)
+        if scratch is None:
+            scratch = local.scratch = hyperscan.Scratch(db)
+
+        matched = [False]
+        try:
+            db.scan(
+                sql.encode('ascii'),
+                match_event_handler=_on_hyperscan_match,
+                context=matched,
+                scratch=scratch
+            )
+        except hyperscan.ScanTerminated:
+            pass
 
-        return False
+        return matched[0]
 
     @staticmethod
     def sanitize_sql_for_display(sql: str) -> str:
@@ -173,14 +276,8 @@ class QueryValidator:
         Returns:
             Sanitized SQL string
         """
-        # Remove SQL comments
-        sql = re.sub(r'--.*$', '', sql, flags=re.MULTILINE)
-        sql = re.sub(r'/\*.*?\*/', '', sql, flags=re.DOTALL)
-
-        # Normalize whitespace
-        sql = ' '.join(sql.split())
-
-        return sql.strip()
+        # Remove SQL comments and normalize whitespace (split() already trims)
+        return ' '.join(QueryValidator._COMMENT_RE.sub('', sql).split())
 
 
 class ErrorResponse:
@@ -223,6 +320,10 @@ class ErrorResponse:
         }
 
 
+# Size units for format_file_size, in 1024 steps
+_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
+
 def format_file_size(size_bytes: int) -> str:
     """
     Format file size in human-readable format.
@@ -233,26 +334,46 @@ def format_file_size(size_bytes: int) -> str:
     Returns:
         Formatted string (e.g., "2.5 MB")
     """
-    for unit in ['B', 'KB', 'MB', 'GB']:
-        if size_bytes < 1024.0:
-            return f"{size_bytes:.1f} {unit}"
-        size_bytes /= 1024.0
-    return f"{size_bytes:.1f} TB"
-
-
-def truncate_text(text: str, max_length: int = 100, suffix: str = "...") -> str:
+    # Zero, negative and fractional sizes are always shown in bytes
+    if size_bytes < 1024:
+        return f"{size_bytes:.1f} B"
+    # Each unit is 10 bits, so the bit length picks the unit directly
+    unit = min((int(size_bytes).bit_length() - 1) // 10, len(_UNITS) - 1)
+    return f"{size_bytes / (1 << (unit * 10)):.1f} {_UNITS[unit]}"
+
+
+def truncate_text(
+    text: str,
+    max_length: int = 100,
+    suffix: str = "...",
+    max_bytes: Optional[int] = None
+) -> str:
     """
     Truncate text to maximum length.
 
     Args:
         text: Text to truncate
-        max_length: Maximum length
+        max_length: Maximum length in characters
         suffix: Suffix to add if truncated
+        max_bytes: Optional maximum UTF-8 encoded size, for byte-bounded sinks
+            (log lines, headers, metadata fields)
 
     Returns:
         Truncated text
     """
-    if len(text) <= max_length:
-        return text
-
-    return text[:max_length - len(suffix)] + suffix
+    if max_bytes is not None and text.isascii() and suffix.isascii():
+        # ASCII is one byte per character, so the byte limit is a character limit
+        max_length = min(max_length, max_bytes)
+        max_bytes = None
+
+    if len(text) > max_length:
+        text = text[:max(max_length - len(suffix), 0)] + suffix
+
+    if max_bytes is not None:
+        encoded = text.encode('utf-8')
+        if len(encoded) > max_bytes:
+            keep = max(max_bytes - len(suffix.encode('utf-8')), 0)
+            # 'ignore' drops a multi-byte character split by the cut
+            text = encoded[:keep].decode('utf-8', 'ignore') + suffix
+
+    return text
@@ -10,6 +10,11 @@ from pathlib import Path
 from typing import List, Dict, Any
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from datasets import Dataset
 from ragas import evaluate
 from ragas.metrics import faithfulness, answer_relevancy
@@ -22,6 +27,20 @@ from app.services.sql_service import TextToSQLService
 from app.services.router_service import QueryRouter
 
 
+# Maximum number of test queries in flight at once (OpenAI/Pinecone/DB are I/O-bound)
+EVAL_MAX_CONCURRENCY = 8
+
+
+def _json_dumps(value: Any, indent: bool = False) -> bytes:
+    """Serialize to JSON bytes, using orjson when available."""
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(value, option=option)
+    return json.dumps(value, indent=2 if indent else None).encode()
+
+
 class RAGEvaluator:
     """Evaluates RAG system using RAGAS metrics."""
 
@@ -71,11 +90,28 @@ class RAGEvaluator:
         if not self.test_queries_path.exists():
             raise FileNotFoundError(f"Test queries file not found: {self.test_queries_path}")
 
-        with open(self.test_queries_path, 'r') as f:
-            data = json.load(f)
+        raw = self.test_queries_path.read_bytes()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
 
         return data['test_queries']
 
+    async def _run_sql(self, question: str) -> Dict[str, Any]:
+        """Generate SQL for a question and execute it (auto-approved)."""
+        sql_result = await self.sql_service.generate_sql_for_approval(question)
+        return await self.sql_service.execute_approved_query(
+            sql_result['query_id'],
+            approved=True
+        )
+
+    async def _run_rag(self, question: str) -> Dict[str, Any]:
+        """Answer a question from the document index."""
+        return await self.rag_service.generate_answer(
+            question=question,
+            top_k=3,
+            namespace="default",
+            include_sources=True
+        )
+
     async def run_query(self, test_query: Dict[str, Any]) -> Dict[str, Any]:
         """
         Run a single test query through the system.
@@ -109,16 +145,12 @@ class RAGEvaluator:
                     return result
 
                 # Generate and execute SQL
-                sql_result = self.sql_service.generate_sql_for_approval(question)
-                execution_result = self.sql_service.execute_approved_query(
-                    sql_result['query_id'],
-                    approved=True
-                )
+                execution_result = await self._run_sql(question)
 
                 # Format answer from SQL results
                 answer_parts = [
                     f"SQL Query: {execution_result['sql']}",
-                    f"Results: {json.dumps(execution_result['results'][:5])}",  # First 5 rows
+                    f"Results: {_json_dumps(execution_result['results'][:5]).decode()}",  # First 5 rows
                     f"Total rows: {execution_result['result_count']}"
                 ]
                 result['answer'] = "\n".join(answer_parts)
@@ -131,12 +163,7 @@ class RAGEvaluator:
                     return result
 
                 # Query documents using RAG
-                rag_result = await self.rag_service.generate_answer(
-                    question=question,
-                    top_k=3,
-                    namespace="default",
-                    include_sources=True
-                )
+                rag_result = await self._run_rag(question)
 
                 result['answer'] = rag_result['answer']
                 result['contexts'] = [
@@ -149,24 +176,15 @@ class RAGEvaluator:
                     result['answer'] = "N/A - Services unavailable"
                     return result
 
-                # Get SQL results
-                sql_result = self.sql_service.generate_sql_for_approval(question)
-                execution_result = self.sql_service.execute_approved_query(
-                    sql_result['query_id'],
-                    approved=True
-                )
-
-                # Get document context
-                rag_result = await self.rag_service.generate_answer(
-                    question=question,
-                    top_k=3,
-                    namespace="default",
-                    include_sources=True
+                # SQL results and document context are independent - fetch both at once
+                execution_result, rag_result = await asyncio.gather(
+                    self._run_sql(question),
+                    self._run_rag(question)
                 )
 
                 # Combine both
                 answer_parts = [
-                    f"SQL Results: {json.dumps(execution_result['results'][:5])}",
+                    f"SQL Results: {_json_dumps(execution_result['results'][:5]).decode()}",
                     f"Context from Documents: {rag_result['answer']}"
                 ]
                 result['answer'] = "\n".join(answer_parts)
@@ -182,28 +200,40 @@ class RAGEvaluator:
         return result
 
     async def run_all_queries(self) -> List[Dict[str, Any]]:
-        """Run all test queries and collect results."""
+        """
+        Run all test queries concurrently and collect results.
+
+        Queries are issued in parallel under a semaphore of EVAL_MAX_CONCURRENCY;
+        results are returned in the same order as the test query file.
+        """
         test_queries = self.load_test_queries()
-        results = []
+        total = len(test_queries)
+        semaphore = asyncio.Semaphore(EVAL_MAX_CONCURRENCY)
 
-        print(f"\nRunning {len(test_queries)} test queries...")
+        print(f"\nRunning {total} test queries (concurrency: {EVAL_MAX_CONCURRENCY})...")
         print("=" * 60)
 
-        for i, test_query in enumerate(test_queries, 1):
-            print(f"\n[{i}/{len(test_queries)}] Running query: {test_query['id']}")
+        async def run_one(i: int, test_query: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                result = await self.run_query(test_query)
+
+            # Log after completion so each query's lines stay together
+            print(f"\n[{i}/{total}] Query: {test_query['id']}")
             print(f"Type: {test_query['type']}")
             print(f"Question: {test_query['question']}")
-
-            result = await self.run_query(test_query)
-            results.append(result)
-
             if result['error']:
                 print(f"ERROR: {result['error']}")
             else:
                 print(f"✓ Query completed")
 
+            return result
+
+        results = await asyncio.gather(
+            *(run_one(i, test_query) for i, test_query in enumerate(test_queries, 1))
+        )
+
         print("\n" + "=" * 60)
-        return results
+        return list(results)
 
     def evaluate_with_ragas(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
@@ -215,10 +245,19 @@ class RAGEvaluator:
         Returns:
             Evaluation scores and metrics
         """
-        # Filter out results with errors
-        valid_results = [r for r in results if not r['error'] and r['answer'] != "N/A - Services unavailable"]
-
-        if not valid_results:
+        # Filter out results with errors and build the RAGAS columns in one pass
+        questions, answers, contexts, ground_truths = [], [], [], []
+        for r in results:
+            if r['error'] or r['answer'] == "N/A - Services unavailable":
+                continue
+            questions.append(r['question'])
+            answers.append(r['answer'])
+            contexts.append(r['contexts'])
+            ground_truths.append(r['ground_truth'])
+
+        valid_count = len(questions)
+
+        if not valid_count:
             print("\nWARNING: No valid results to evaluate (services not initialized)")
             return {
                 "error": "No valid results - services not initialized",
@@ -226,14 +265,14 @@ class RAGEvaluator:
                 "skipped_queries": len(results)
             }
 
-        print(f"\nEvaluating {len(valid_results)} queries with RAGAS...")
+        print(f"\nEvaluating {valid_count} queries with RAGAS...")
 
         # Convert to RAGAS Dataset format
         dataset_dict = {
-            "question": [r['question'] for r in valid_results],
-            "answer": [r['answer'] for r in valid_results],
-            "contexts": [r['contexts'] for r in valid_results],
-            "ground_truth": [r['ground_truth'] for r in valid_results]
+            "question": questions,
+            "answer": answers,
+            "contexts": contexts,
+            "ground_truth": ground_truths
         }
 
         dataset = Dataset.from_dict(dataset_dict)
@@ -248,8 +287,8 @@ class RAGEvaluator:
             scores = {
                 "faithfulness": float(evaluation_result['faithfulness']),
                 "answer_relevancy": float(evaluation_result['answer_relevancy']),
-                "evaluated_queries": len(valid_results),
-                "skipped_queries": len(results) - len(valid_results)
+                "evaluated_queries": valid_count,
+                "skipped_queries": len(results) - valid_count
             }
 
             print("\n" + "=" * 60)
@@ -286,8 +325,7 @@ class RAGEvaluator:
             }
         }
 
-        with open(self.results_path, 'w') as f:
-            json.dump(output, f, indent=2)
+        self.results_path.write_bytes(_json_dumps(output, indent=True))
 
         print(f"\n✓ Results saved to: {self.results_path}")
 
@@ -12,6 +12,18 @@ os.makedirs("/tmp/cached_chunks", exist_ok=True)
 
 # Import app after directory creation
 from app.main import app, initialize_services
+from app.logging_config import get_logger
+
+logger = get_logger("rag_app.lambda_handler")
+
+# Load the tokenizer during the Lambda init phase (BPE ranks are baked into the image
+# via TIKTOKEN_CACHE_DIR), so the first chunking request doesn't pay for it.
+# Best effort: if the ranks can't be loaded here, the first request loads them lazily.
+try:
+    import tiktoken
+    tiktoken.get_encoding("cl100k_base")
+except Exception as e:
+    logger.warning(f"Tokenizer warm-up failed, will load on first use: {e}")
 
 # Lambda handler with lazy initialization
 # API Gateway HTTP API (v2 payload format)
@@ -0,0 +1,133 @@
+"""
+Unit tests for tokenization and chunking helpers in app.services.document_service.
+
+Uses a small byte-level tiktoken Encoding so the tests run offline.
+"""
+
+from unittest.mock import patch
+
+import pytest
+import tiktoken
+
+from app.services import document_service
+
+
+# cl100k_base pre-tokenizer pattern
+CL100K_PAT_STR = (
+    r"""'(?i:[sdmt]|ll|ve|re)|[^\r\n\p{L}\p{N}]?+\p{L}++|\p{N}{1,3}+| ?[^\s\p{L}\p{N}]++[\r\n]*+|"""
+    r"""\s++$|\s*[\r\n]|\s+(?!\S)|\s"""
+)
+
+
+# Test fixtures
+
+@pytest.fixture(scope="module")
+def byte_encoder():
+    """Byte-level BPE with a few merges, including runs of newlines."""
+    ranks = {bytes([i]): i for i in range(256)}
+    for merged in (b"\n\n", b"\n\n\n", b"\n\n\n\n", b"th", b"the", b"he"):
+        ranks[merged] = len(ranks)
+    return tiktoken.Encoding(
+        "test_bytes",
+        pat_str=CL100K_PAT_STR,
+        mergeable_ranks=ranks,
+        special_tokens={}
+    )
+
+
+@pytest.fixture
+def patched_encoder(byte_encoder):
+    """Make document_service use the offline encoder."""
+    with patch.object(document_service, "_get_encoder", return_value=byte_encoder):
+        yield byte_encoder
+
+
+class TestDocumentStats:
+    """Tests for get_document_stats token counting."""
+
+    @pytest.mark.parametrize("text", [
+        "a\n\n\nb\n\n\n\nc",
+        "the first paragraph\n\nthe second\n\n\n\n\nthe third\n",
+        "\n\n\nleading blank lines\n\n  indented paragraph",
+        "no paragraphs at all",
+        "",
+    ])
+    def test_paragraph_token_count_matches_single_encode(self, patched_encoder, tmp_path, text):
+        """Test that per-paragraph counts sum to the count of one full encode."""
+        path = tmp_path / "doc.txt"
+        path.write_text(text)
+
+        stats = document_service.get_document_stats(str(path))
+
+        assert stats["token_count"] == len(patched_encoder.encode_ordinary(text))
+        assert stats["character_count"] == len(text)
+
+
+class TestTokenCharOffsets:
+    """Tests for mapping token boundaries to character offsets."""
+
+    def test_multibyte_character_split_across_tokens(self, byte_encoder):
+        """Test that a boundary inside a UTF-8 character maps to the character's end."""
+        text = "aé b"
+        tokens = byte_encoder.encode_ordinary(text)
+        assert len(tokens) == 5  # 'a', 0xC3, 0xA9, ' ', 'b'
+
+        offsets = document_service._token_char_offsets(byte_encoder, tokens)
+
+        assert offsets.tolist() == [0, 1, 2, 2, 3, 4]
+
+    @pytest.mark.parametrize("text", [
+        "plain ascii text",
+        "naïve café — 日本語テキスト 🚀 done",
+        "",
+    ])
+    def test_offsets_cover_text(self, byte_encoder, text):
+        """Test that offsets are monotonic, start at 0 and end at len(text)."""
+        tokens = byte_encoder.encode_ordinary(text)
+        offsets = document_service._token_char_offsets(byte_encoder, tokens).tolist()
+
+        assert offsets[0] == 0
+        assert offsets[-1] == len(text)
+        assert offsets == sorted(offsets)
+
+    def test_chunks_are_exact_slices(self, patched_encoder):
+        """Test that chunk text is sliced from the source at the reported offsets."""
+        text = "naïve café — 日本語テキスト 🚀 " * 20
+        chunks = document_service.chunk_text(text, chunk_size=16, overlap=0)
+
+        assert "".join(chunk["text"] for chunk in chunks) == text
+        for chunk in chunks:
+            assert chunk["text"] == text[chunk["start_char"]:chunk["end_char"]]
+
+
+def _while_loop_windows(num_tokens, chunk_size, overlap):
+    """Window boundaries as produced by the original chunk_text while-loop."""
+    windows = []
+    start_idx = 0
+    while start_idx < num_tokens:
+        end_idx = min(start_idx + chunk_size, num_tokens)
+        windows.append((start_idx, end_idx))
+        start_idx += chunk_size - overlap
+        if end_idx >= num_tokens:
+            break
+    return windows
+
+
+class TestChunkWindows:
+    """Tests for closed-form chunk window computation."""
+
+    @pytest.mark.parametrize("num_tokens", [0, 1, 49, 50, 51, 99, 100, 101, 512, 1000, 1337])
+    @pytest.mark.parametrize("chunk_size, overlap", [(50, 0), (50, 10), (50, 49), (512, 50), (1, 0)])
+    def test_matches_while_loop(self, num_tokens, chunk_size, overlap):
+        """Test that windows match the original loop for many sizes."""
+        starts, ends = document_service._chunk_windows(num_tokens, chunk_size, overlap)
+
+        assert list(zip(starts.tolist(), ends.tolist())) == _while_loop_windows(
+            num_tokens, chunk_size, overlap
+        )
+
+    @pytest.mark.parametrize("chunk_size, overlap", [(10, 10), (10, 11), (10, -1), (10, -10)])
+    def test_rejects_invalid_overlap(self, chunk_size, overlap):
+        """Test that overlap outside [0, chunk_size) is rejected."""
+        with pytest.raises(ValueError, match="overlap"):
+            document_service._chunk_windows(10, chunk_size, overlap)
@@ -0,0 +1,185 @@
+"""
+Unit tests for EmbeddingService request batching and concurrency limits.
+
+The OpenAI client is replaced with an in-memory fake, so no network is needed.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import embedding_service
+from app.services.embedding_service import EmbeddingService
+
+
+class FakeEmbeddings:
+    """Stand-in for client.embeddings that records batches and concurrency."""
+
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.batches = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create(self, model, input, encoding_format):
+        """Return one vector per input, encoding the input's length."""
+        self.batches.append(list(input))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+
+        return SimpleNamespace(
+            data=[SimpleNamespace(embedding=[float(len(text))]) for text in input],
+            usage=SimpleNamespace(prompt_tokens=len(input), total_tokens=len(input))
+        )
+
+
+# Test fixtures
+
+@pytest.fixture
+def fake_embeddings():
+    """Fake embeddings endpoint."""
+    return FakeEmbeddings()
+
+
+@pytest.fixture
+def service(fake_embeddings, monkeypatch):
+    """EmbeddingService (no cache) wired to the fake endpoint."""
+    fake_client = SimpleNamespace(embeddings=fake_embeddings)
+    monkeypatch.setattr(embedding_service, "get_openai_client", lambda api_key: fake_client)
+    return EmbeddingService(api_key="test-key")
+
+
+class TestGetOpenAIClient:
+    """Tests for per-event-loop client sharing."""
+
+    async def test_client_shared_within_a_loop(self):
+        """Test that repeated lookups in one loop return the same client."""
+        first = embedding_service.get_openai_client("test-key")
+
+        assert embedding_service.get_openai_client("test-key") is first
+        assert embedding_service.get_openai_client("other-key") is not first
+
+    def test_each_loop_gets_its_own_client(self):
+        """Test that separate asyncio.run loops don't share a connection pool."""
+        async def lookup():
+            return embedding_service.get_openai_client("test-key")
+
+        assert asyncio.run(lookup()) is not asyncio.run(lookup())
+
+    def test_requires_running_loop(self):
+        """Test that lookups outside an event loop are rejected."""
+        with pytest.raises(RuntimeError):
+            embedding_service.get_openai_client("test-key")
+
+
+class TestCreateEmbeddings:
+    """Tests for sub-batched embedding requests."""
+
+    async def test_concurrency_cap_is_shared_across_calls(self, service, fake_embeddings):
+        """Test that concurrent calls share one EMBEDDING_MAX_CONCURRENCY budget."""
+        batch = embedding_service.EMBEDDING_BATCH_SIZE
+        limit = embedding_service.EMBEDDING_MAX_CONCURRENCY
+        texts = [f"text {i}" for i in range(batch * limit)]
+
+        await asyncio.gather(
+            service._create_embeddings(texts),
+            service._create_embeddings([t + "!" for t in texts])
+        )
+
+        assert len(fake_embeddings.batches) == 2 * limit
+        assert fake_embeddings.max_in_flight == limit
+
+    async def test_duplicate_texts_embedded_once(self, service, fake_embeddings):
+        """Test that repeated texts are sent once and fanned back out."""
+        embeddings, usage = await service._create_embeddings(["a", "bb", "a", "a"])
+
+        assert fake_embeddings.batches == [["a", "bb"]]
+        assert embeddings == [[1.0], [2.0], [1.0], [1.0]]
+        assert usage == {"prompt_tokens": 2, "total_tokens": 2}
+
+
+class TestEmbedBatcher:
+    """Tests for coalescing concurrent single-text requests."""
+
+    @staticmethod
+    def make_embed_fn(calls, error=None):
+        """Batch embed function that records its calls (and optionally fails)."""
+        async def embed_fn(texts):
+            calls.append(list(texts))
+            await asyncio.sleep(0)
+            if error is not None:
+                raise error
+            usage = {"prompt_tokens": 10 * len(texts), "total_tokens": 10 * len(texts)}
+            return [[float(len(text))] for text in texts], usage
+        return embed_fn
+
+    async def test_concurrent_submits_are_coalesced(self):
+        """Test that concurrent callers share one embed call and get their own vectors."""
+        calls = []
+        batcher = embedding_service._EmbedBatcher(self.make_embed_fn(calls))
+
+        results = await asyncio.gather(*(batcher.submit(text) for text in ["a", "bb", "ccc"]))
+
+        assert calls == [["a", "bb", "ccc"]]
+        assert [embedding for embedding, _ in results] == [[1.0], [2.0], [3.0]]
+
+    async def test_usage_is_shared_by_text_length(self):
+        """Test that coalesced callers split the batch's token usage."""
+        batcher = embedding_service._EmbedBatcher(self.make_embed_fn([]))
+
+        results = await asyncio.gather(batcher.submit("a"), batcher.submit("bbb"))
+
+        usages = [usage for _, usage in results]
+        assert [u["total_tokens"] for u in usages] == [5, 15]
+        assert all(u["coalesced_requests"] == 2 for u in usages)
+
+    async def test_single_request_keeps_full_usage(self):
+        """Test that an uncoalesced request gets the usage unchanged."""
+        batcher = embedding_service._EmbedBatcher(self.make_embed_fn([]))
+
+        _, usage = await batcher.submit("solo")
+
+        assert usage == {"prompt_tokens": 10, "total_tokens": 10}
+
+    async def test_full_batch_flushes_immediately(self, monkeypatch):
+        """Test that reaching EMBEDDING_BATCH_SIZE flushes without waiting for the timer."""
+        monkeypatch.setattr(embedding_service, "EMBEDDING_BATCH_SIZE", 2)
+        monkeypatch.setattr(embedding_service, "EMBEDDING_COALESCE_WINDOW", 60)
+        calls = []
+        batcher = embedding_service._EmbedBatcher(self.make_embed_fn(calls))
+
+        await asyncio.wait_for(asyncio.gather(batcher.submit("a"), batcher.submit("b")), 1)
+
+        assert calls == [["a", "b"]]
+
+    async def test_error_is_sent_to_every_waiter(self):
+        """Test that a failed batch raises in every coalesced caller."""
+        batcher = embedding_service._EmbedBatcher(
+            self.make_embed_fn([], error=RuntimeError("rate limited"))
+        )
+
+        results = await asyncio.gather(
+            batcher.submit("a"), batcher.submit("b"), return_exceptions=True
+        )
+
+        assert all(isinstance(r, RuntimeError) and str(r) == "rate limited" for r in results)
+
+    async def test_cancelled_waiter_is_skipped(self):
+        """Test that a cancelled caller doesn't break delivery to the others."""
+        calls = []
+        batcher = embedding_service._EmbedBatcher(self.make_embed_fn(calls))
+
+        cancelled = asyncio.ensure_future(batcher.submit("gone"))
+        kept = asyncio.ensure_future(batcher.submit("kept"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+
+        embedding, _ = await kept
+        assert embedding == [4.0]
+        assert cancelled.cancelled()
+        assert calls == [["gone", "kept"]]
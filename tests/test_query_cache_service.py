@@ -0,0 +1,120 @@
+"""
+Unit tests for QueryCacheService serialization and key invalidation.
+
+Uses an in-memory fake of the Upstash Redis client, so no network is needed.
+"""
+
+import fnmatch
+import json
+
+import numpy as np
+import pytest
+
+from app.services import query_cache_service
+from app.services.embedding_service import _encode_embedding
+from app.services.query_cache_service import COMPRESSED_PREFIX, QueryCacheService
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for upstash_redis.Redis with paged SCAN."""
+
+    def __init__(self, keys, page_size=3):
+        self.data = {key: "{}" for key in keys}
+        self.keyspace = sorted(self.data)  # Fixed scan order, like a real cursor
+        self.page_size = page_size
+        self.scan_calls = 0
+        self.delete_calls = []
+
+    def scan(self, cursor, match=None, count=None):
+        """Return one page of matching keys; cursor 0 means the scan is done."""
+        self.scan_calls += 1
+        page = self.keyspace[int(cursor):int(cursor) + self.page_size]
+        next_cursor = int(cursor) + self.page_size
+        if next_cursor >= len(self.keyspace):
+            next_cursor = 0
+        return next_cursor, [
+            key for key in page if key in self.data and fnmatch.fnmatchcase(key, match)
+        ]
+
+    def delete(self, *keys):
+        """Delete keys and return how many existed."""
+        self.delete_calls.append(keys)
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+
+# Test fixtures
+
+@pytest.fixture
+def cache():
+    """A cache service in pass-through mode (no Redis credentials)."""
+    return QueryCacheService()
+
+
+@pytest.fixture
+def connected_cache(cache):
+    """Cache service wired to a fake Redis holding mixed key types over several pages."""
+    keys = [f"rag:{i}" for i in range(7)] + [f"embedding:{i}" for i in range(5)]
+    cache.client = FakeRedis(keys)
+    cache.enabled = True
+    return cache
+
+
+class TestSerialization:
+    """Tests for payload serialization and compression."""
+
+    def test_small_payload_stored_as_plain_json(self, cache):
+        """Test that payloads under the threshold are stored uncompressed."""
+        value = {"answer": "short", "sources": [1, 2, 3]}
+        serialized = cache._serialize(value)
+
+        assert not serialized.startswith(COMPRESSED_PREFIX)
+        assert json.loads(serialized) == value
+
+    @pytest.mark.skipif(query_cache_service.zstandard is None, reason="zstandard not installed")
+    def test_compressed_round_trip(self, cache):
+        """Test that large compressible payloads round-trip through the Z: form."""
+        value = {"answer": "the refund policy allows returns " * 200, "count": 42}
+        serialized = cache._serialize(value)
+
+        assert serialized.startswith(COMPRESSED_PREFIX)
+        assert len(serialized) < len(json.dumps(value))
+        assert cache._deserialize(serialized) == value
+
+    def test_dense_embedding_not_compressed(self, cache):
+        """Test that base64 float16 embeddings skip compression (saving is negligible)."""
+        vector = np.random.default_rng(0).standard_normal(1536)
+        embedding = (vector / np.linalg.norm(vector)).tolist()  # Unit-norm, like OpenAI's
+        value = {"embedding_f16": _encode_embedding(embedding), "model": "text-embedding-3-small"}
+        serialized = cache._serialize(value)
+
+        assert len(serialized) > query_cache_service.COMPRESSION_THRESHOLD
+        assert not serialized.startswith(COMPRESSED_PREFIX)
+        assert cache._deserialize(serialized) == value
+
+    def test_reads_legacy_plain_json(self, cache):
+        """Test that entries written by json.dumps before this format are still read."""
+        legacy = json.dumps({"embedding": [0.1, 0.2, 0.3], "model": "m"})
+        assert cache._deserialize(legacy) == {"embedding": [0.1, 0.2, 0.3], "model": "m"}
+
+
+class TestDelete:
+    """Tests for SCAN-based pattern invalidation."""
+
+    def test_delete_walks_every_scan_page(self, connected_cache):
+        """Test that matches on every cursor page are deleted, others kept."""
+        deleted = connected_cache.delete("rag:*")
+
+        assert deleted == 7
+        assert sorted(connected_cache.client.data) == [f"embedding:{i}" for i in range(5)]
+        assert connected_cache.client.scan_calls == 4  # 12 keys / 3 per page
+
+    def test_delete_skips_empty_pages(self, connected_cache):
+        """Test that pages with no matches don't issue a DEL."""
+        connected_cache.delete("embedding:*")
+
+        assert all(connected_cache.client.delete_calls)
+        assert len(connected_cache.client.delete_calls) == 2
+
+    def test_delete_disabled_cache(self, cache):
+        """Test that a pass-through cache deletes nothing."""
+        assert cache.delete("rag:*") == 0
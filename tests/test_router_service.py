@@ -0,0 +1,116 @@
+"""
+Unit tests for the keyword-based QueryRouter.
+
+Checks routing decisions and that the Aho-Corasick keyword scan produces the
+same match counts as the plain substring fallback.
+"""
+
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from app.services import router_service
+from app.services.router_service import QueryRouter
+
+
+TEST_QUERIES_PATH = Path(__file__).parent / "test_queries.json"
+
+
+# Test fixtures
+
+@pytest.fixture
+def eval_questions():
+    """Questions from the evaluation query set."""
+    with open(TEST_QUERIES_PATH) as f:
+        return [q["question"] for q in json.load(f)["test_queries"]]
+
+
+@pytest.fixture
+def sample_questions(eval_questions):
+    """Evaluation questions plus a few edge cases."""
+    return eval_questions + [
+        "",
+        "hello there",
+        "SHOW ALL ORDERS AND EXPLAIN THE REFUND POLICY",
+        "how many how many how many",
+    ]
+
+
+class TestQueryRouter:
+    """Tests for routing decisions."""
+
+    @pytest.fixture(autouse=True)
+    def clear_routing_cache(self):
+        """Start every test with an empty classification cache."""
+        QueryRouter.cache_clear()
+        yield
+        QueryRouter.cache_clear()
+
+    def test_route_sql(self):
+        """Test that data questions route to SQL."""
+        assert QueryRouter.route("How many customers do we have?") == "SQL"
+
+    def test_route_documents(self):
+        """Test that knowledge questions route to DOCUMENTS."""
+        assert QueryRouter.route("What is our return policy?") == "DOCUMENTS"
+
+    def test_route_hybrid(self):
+        """Test that combined questions route to HYBRID."""
+        assert QueryRouter.route("Show total sales and explain our pricing strategy") == "HYBRID"
+
+    def test_route_defaults_to_documents(self):
+        """Test that questions without keywords default to DOCUMENTS."""
+        assert QueryRouter.route("hello there") == "DOCUMENTS"
+
+    def test_confidence_counts_distinct_keywords(self):
+        """Test that repeated keywords are only counted once."""
+        confidence = QueryRouter.get_routing_confidence("how many how many how many")
+        assert confidence["keyword_matches"]["sql_keywords"] == 1
+        assert confidence["route"] == "SQL"
+
+    def test_route_is_cached_per_normalized_question(self):
+        """Test that case/whitespace variants of a question share one cache entry."""
+        QueryRouter.route("How many customers do we have?")
+        QueryRouter.route("  HOW MANY CUSTOMERS DO WE HAVE?  ")
+        info = router_service._classify.cache_info()
+        assert info.misses == 1
+        assert info.hits == 1
+
+    def test_explain_routing(self):
+        """Test that the explanation names the chosen route."""
+        explanation = QueryRouter.explain_routing("What is our return policy?")
+        assert explanation.startswith("Question routed to: DOCUMENTS")
+
+    def test_explain_routing_classifies_once(self):
+        """Test that explain_routing does a single cache lookup."""
+        QueryRouter.explain_routing("What is our return policy?")
+        info = router_service._classify.cache_info()
+        assert info.misses + info.hits == 1
+
+
+class TestKeywordScan:
+    """Tests for the keyword matching backends."""
+
+    @pytest.mark.skipif(router_service.ahocorasick is None, reason="pyahocorasick not installed")
+    def test_automaton_matches_substring_fallback(self, sample_questions):
+        """Test that Aho-Corasick and substring scans give identical counts."""
+        for question in sample_questions:
+            question_lower = question.lower()
+            automaton_counts = router_service._count_keyword_matches(question_lower)
+
+            with patch.object(router_service, "_get_automaton", return_value=None):
+                fallback_counts = router_service._count_keyword_matches(question_lower)
+
+            assert automaton_counts == fallback_counts, question
+
+    def test_keyword_tables_are_unique(self):
+        """Test that each keyword table has no duplicates (counts rely on it)."""
+        for keywords in (
+            QueryRouter.SQL_KEYWORDS,
+            QueryRouter.DOCUMENT_KEYWORDS,
+            QueryRouter.HYBRID_KEYWORDS,
+        ):
+            assert isinstance(keywords, tuple)
+            assert len(set(keywords)) == len(keywords)
@@ -0,0 +1,137 @@
+"""
+Unit tests for validation and formatting helpers in app.utils.
+"""
+
+import io
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from app.utils import (
+    FileValidator, QueryValidator, ValidationError, format_file_size, truncate_text
+)
+
+
+class TestFileValidator:
+    """Tests for upload filename and size validation."""
+
+    @pytest.mark.parametrize("filename, expected", [
+        ("report.PDF", ".pdf"),
+        ("archive.tar.csv", ".csv"),
+        ("README", ""),
+        ("notes.", "."),
+    ])
+    def test_get_file_extension(self, filename, expected):
+        """Test that the last extension is returned lowercased."""
+        assert FileValidator.get_file_extension(filename) == expected
+
+    def test_validate_file_rejects_unknown_extension(self):
+        """Test that unsupported file types are rejected."""
+        upload = SimpleNamespace(filename="payload.exe", size=10)
+        with pytest.raises(ValidationError, match="Invalid file type '.exe'"):
+            FileValidator.validate_file(upload)
+
+    def test_validate_file_measures_size_when_unreported(self):
+        """Test that a missing size is measured from the file without consuming it."""
+        spooled = io.BytesIO(b"x" * (FileValidator.MAX_FILE_SIZE + 1))
+        upload = SimpleNamespace(filename="big.pdf", size=None, file=spooled)
+        with pytest.raises(ValidationError, match="exceeds maximum"):
+            FileValidator.validate_file(upload)
+        assert spooled.tell() == 0
+
+    def test_validate_file_rejects_oversized(self):
+        """Test that files above MAX_FILE_SIZE are rejected."""
+        upload = SimpleNamespace(filename="big.pdf", size=FileValidator.MAX_FILE_SIZE + 1)
+        with pytest.raises(ValidationError, match="exceeds maximum"):
+            FileValidator.validate_file(upload)
+
+
+class TestQueryValidator:
+    """Tests for SQL safety checks and display sanitization."""
+
+    @pytest.mark.parametrize("sql", [
+        "DROP TABLE customers",
+        "select 1; drop   table customers",
+        "delete from orders where id = 1",
+        "TRUNCATE products",
+        "alter table orders add column x int",
+        "create table t (id int)",
+        "insert into orders values (1)",
+        "update customers set name = 'x'",
+    ])
+    def test_check_dangerous_sql_detects(self, sql):
+        """Test that each dangerous pattern is detected regardless of case."""
+        assert QueryValidator.check_dangerous_sql(sql)
+
+    @pytest.mark.parametrize("sql", [
+        "SELECT * FROM customers",
+        "SELECT updated_at FROM orders",
+        "SELECT dropped FROM deletions",
+    ])
+    def test_check_dangerous_sql_allows_reads(self, sql):
+        """Test that read-only queries are not flagged."""
+        assert not QueryValidator.check_dangerous_sql(sql)
+
+    def test_sanitize_sql_for_display(self):
+        """Test that comments are removed and whitespace is normalized."""
+        sql = "SELECT id  -- primary key\nFROM /* all\nrows */ customers\n"
+        assert QueryValidator.sanitize_sql_for_display(sql) == "SELECT id FROM customers"
+
+    def test_sanitize_sql_block_comment_containing_dashes(self):
+        """Test that '--' inside a block comment does not swallow the rest of the line."""
+        sql = "SELECT id /* -- note */ FROM customers"
+        assert QueryValidator.sanitize_sql_for_display(sql) == "SELECT id FROM customers"
+
+    @pytest.mark.skipif(QueryValidator._DANGEROUS_HS_DB is None, reason="hyperscan not installed")
+    @pytest.mark.parametrize("sql", [
+        "drop table customers",
+        "SELECT updated_at FROM orders",
+        "UPDATE orders SET status = 'x'",
+        "-- comment only",
+        "",
+        "UPDATE café SET x=1",
+        "update tablé set x=1",
+        "DELETE\xa0FROM t",
+        "éDROP TABLE x",
+    ])
+    def test_hyperscan_matches_re_fallback(self, sql):
+        """Test that the Hyperscan and re backends agree."""
+        with patch.object(QueryValidator, "_DANGEROUS_HS_DB", None):
+            expected = QueryValidator.check_dangerous_sql(sql)
+        assert QueryValidator.check_dangerous_sql(sql) == expected
+
+
+class TestFormatting:
+    """Tests for human-readable formatting helpers."""
+
+    @pytest.mark.parametrize("size_bytes, expected", [
+        (0, "0.0 B"),
+        (0.5, "0.5 B"),
+        (-2048, "-2048.0 B"),
+        (1023, "1023.0 B"),
+        (1024, "1.0 KB"),
+        (1536, "1.5 KB"),
+        (1024 ** 2 - 1, "1024.0 KB"),
+        (50 * 1024 ** 2, "50.0 MB"),
+        (3 * 1024 ** 3, "3.0 GB"),
+        (2 * 1024 ** 4, "2.0 TB"),
+        (5000 * 1024 ** 4, "5000.0 TB"),
+    ])
+    def test_format_file_size(self, size_bytes, expected):
+        """Test unit selection and rounding."""
+        assert format_file_size(size_bytes) == expected
+
+    def test_truncate_text(self):
+        """Test character truncation with suffix."""
+        assert truncate_text("short", max_length=10) == "short"
+        assert truncate_text("abcdefghij", max_length=8) == "abcde..."
+        assert truncate_text("abcdefghij", max_length=2) == "..."
+
+    @pytest.mark.parametrize("text", ["a" * 50, "é" * 50, "日本語テキスト" * 10])
+    def test_truncate_text_max_bytes(self, text):
+        """Test that byte-bounded truncation fits the budget and stays valid UTF-8."""
+        result = truncate_text(text, max_length=100, max_bytes=20)
+        assert len(result.encode("utf-8")) <= 20
+        assert result.endswith("...")
+        assert text.startswith(result[:-3])